@@ -77,6 +77,7 @@ setup(
                       'tqdm',
                       'pybind11',  # Required for nmslib build
                       'joblib >= 0.12',
+                      'numba >= 0.49',
                       'nmslib',
                       'annoy',
                       'falconn;platform_system!="Windows"',  # falconn is not available on Windows; see also PEP 508
@@ -25,7 +25,8 @@ from scipy.sparse import issparse, csr_matrix
 from sklearn.neighbors.base import NeighborsBase as SklearnNeighborsBase
 from sklearn.neighbors.base import KNeighborsMixin as SklearnKNeighborsMixin
 from sklearn.neighbors.base import RadiusNeighborsMixin as SklearnRadiusNeighborsMixin
-from sklearn.neighbors.base import UnsupervisedMixin, SupervisedFloatMixin, SupervisedIntegerMixin
+from sklearn.neighbors.base import SupervisedFloatMixin as SklearnSupervisedFloatMixin
+from sklearn.neighbors.base import UnsupervisedMixin, SupervisedIntegerMixin
 from sklearn.neighbors.base import _tree_query_radius_parallel_helper
 from sklearn.neighbors.ball_tree import BallTree
 from sklearn.neighbors.kd_tree import KDTree
@@ -37,7 +38,8 @@ from joblib import Parallel, delayed, effective_n_jobs
 from .approximate_neighbors import ApproximateNearestNeighbor, UnavailableANN
 from .hnsw import HNSW
 from .random_projection_trees import RandomProjectionTree
-from ..reduction import NoHubnessReduction, LocalScaling, MutualProximity, DisSimLocal
+# Hubness reduction classes are resolved lazily on first use
+from .. import reduction
 
 try:
     from .lsh import FalconnLSH
@@ -328,7 +330,7 @@ class NeighborsBase(SklearnNeighborsBase):
                 warnings.warn(f'cannot use hubness reduction with tree: disabling hubness reduction.')
                 self.hubness = None
             self._hubness_reduction_method = None
-            self._hubness_reduction = NoHubnessReduction()
+            self._hubness_reduction = reduction.NoHubnessReduction()
             return self
 
         self._fit_method = self.algorithm
@@ -389,7 +391,7 @@ class NeighborsBase(SklearnNeighborsBase):
             raise ValueError(f"algorithm = '{self.algorithm}' not recognized")
 
         if self._hubness_reduction_method is None:
-            self._hubness_reduction = NoHubnessReduction()
+            self._hubness_reduction = reduction.NoHubnessReduction()
         else:
             n_candidates = self.algorithm_params['n_candidates']
             if 'include_self' in self.kwargs and self.kwargs['include_self']:
@@ -400,11 +402,11 @@ class NeighborsBase(SklearnNeighborsBase):
             neigh_dist_train = neigh_train[0]  # [:, 1:]
             neigh_ind_train = neigh_train[1]  # [:, 1:]
             if self._hubness_reduction_method == 'ls':
-                self._hubness_reduction = LocalScaling(verbose=self.verbose, **self.hubness_params)
+                self._hubness_reduction = reduction.LocalScaling(verbose=self.verbose, **self.hubness_params)
             elif self._hubness_reduction_method == 'mp':
-                self._hubness_reduction = MutualProximity(verbose=self.verbose, **self.hubness_params)
+                self._hubness_reduction = reduction.MutualProximity(verbose=self.verbose, **self.hubness_params)
             elif self._hubness_reduction_method == 'dsl':
-                self._hubness_reduction = DisSimLocal(verbose=self.verbose, **self.hubness_params)
+                self._hubness_reduction = reduction.DisSimLocal(verbose=self.verbose, **self.hubness_params)
             elif self._hubness_reduction_method == 'snn':
                 raise NotImplementedError('feature not yet implemented')
             elif self._hubness_reduction_method == 'simhubin':
@@ -655,6 +657,40 @@ class KNeighborsMixin(SklearnKNeighborsMixin):
         return result
 
 
+class SupervisedFloatMixin(SklearnSupervisedFloatMixin):
+    """Mixin for regression estimators.
+    NOTE: adapted from scikit-learn. """
+
+    def fit(self, X, y):
+        """Fit the model using X as training data and y as target values
+
+        Parameters
+        ----------
+        X : {array-like, sparse matrix, BallTree, KDTree}
+            Training data. If array or matrix, shape [n_samples, n_features],
+            or [n_samples, n_samples] if metric='precomputed'.
+
+        y : {array-like, sparse matrix}
+            Target values, array of float values, shape = [n_samples]
+             or [n_samples, n_outputs]
+        """
+        result = super().fit(X, y)
+        # Cache the 2D view of targets used in predict (refreshed on every fit)
+        self._cache_y_2d()
+        return result
+
+    def _cache_y_2d(self):
+        self._y_is_1d = self._y.ndim == 1
+        self._y_2d = self._y.reshape((-1, 1)) if self._y_is_1d else self._y
+
+    def _get_y_2d(self):
+        """Return the targets as 2D array, caching them if required
+        (e.g. for estimators fitted before the cache was introduced)."""
+        if getattr(self, '_y_2d', None) is None:
+            self._cache_y_2d()
+        return self._y_2d
+
+
 class RadiusNeighborsMixin(SklearnRadiusNeighborsMixin):
     """Mixin for radius-based neighbors searches"""
 
@@ -936,17 +972,24 @@ class RadiusNeighborsMixin(SklearnRadiusNeighborsMixin):
         -----
         This is required until radius_candidates is implemented in addition to kcandiates.
         """
-        sample_range = np.arange(dist.shape[0])[:, None]
-        neigh_ind = np.argpartition(dist, n_neighbors - 1, axis=1)
-        neigh_ind = neigh_ind[:, :n_neighbors]
-        # argpartition doesn't guarantee sorted order, so we sort again
-        neigh_ind = neigh_ind[
-            sample_range, np.argsort(dist[sample_range, neigh_ind])]
+        if n_neighbors == 1:
+            # Single pass without partial sorting
+            neigh_ind = np.argmin(dist, axis=1)[:, None]
+            if return_distance:
+                dist_sorted = np.take_along_axis(dist, neigh_ind, axis=1)
+        else:
+            part = np.argpartition(dist, n_neighbors - 1, axis=1)[:, :n_neighbors]
+            # Gather the candidate distances only once into a small buffer
+            dist_part = np.take_along_axis(dist, part, axis=1)
+            # argpartition doesn't guarantee sorted order, so we sort again
+            order = np.argsort(dist_part, axis=1)
+            neigh_ind = np.take_along_axis(part, order, axis=1)
+            if return_distance:
+                dist_sorted = np.take_along_axis(dist_part, order, axis=1)
         if return_distance:
             if self.effective_metric_ == 'euclidean':
-                result = np.sqrt(dist[sample_range, neigh_ind]), neigh_ind
-            else:
-                result = dist[sample_range, neigh_ind], neigh_ind
+                np.sqrt(dist_sorted, out=dist_sorted)
+            result = dist_sorted, neigh_ind
         else:
             result = neigh_ind
         return result
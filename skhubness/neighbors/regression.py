@@ -14,16 +14,185 @@ adapted from https://github.com/scikit-learn/scikit-learn/blob/0.21.X/sklearn/ne
 # License: BSD 3 clause (C) INRIA, University of Amsterdam,
 #                           University of Copenhagen
 
+from contextlib import contextmanager
 import warnings
 
 import numpy as np
 from scipy.sparse import issparse
 from sklearn.base import RegressorMixin
-from sklearn.utils import check_array
+from sklearn.utils import check_array, gen_even_slices
+from joblib import Parallel, delayed, effective_n_jobs
 
 from .base import _get_weights, _check_weights, NeighborsBase, KNeighborsMixin
 from .base import RadiusNeighborsMixin, SupervisedFloatMixin
 
+try:
+    from numba import config as numba_config
+    from numba import get_num_threads, set_num_threads
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:  # pragma: no cover
+    NUMBA_AVAILABLE = False
+    prange = range
+
+
+def _radius_mean(_y, idx_flat, offsets, out):
+    """ Average targets of ragged neighborhoods (NaN for empty ones).
+
+    Neighborhood i consists of ``idx_flat[offsets[i]:offsets[i + 1]]``.
+    """
+    n_query, n_outputs = out.shape
+    for i in prange(n_query):
+        start = offsets[i]
+        stop = offsets[i + 1]
+        for o in range(n_outputs):
+            out[i, o] = 0.
+        if start == stop:
+            for o in range(n_outputs):
+                out[i, o] = np.nan
+            continue
+        for j in range(start, stop):
+            for o in range(n_outputs):
+                out[i, o] += _y[idx_flat[j], o]
+        for o in range(n_outputs):
+            out[i, o] /= stop - start
+
+
+def _radius_weighted_mean(_y, idx_flat, w_flat, offsets, out):
+    """ Weighted average of targets of ragged neighborhoods (NaN for empty ones).
+
+    Neighborhood i consists of ``idx_flat[offsets[i]:offsets[i + 1]]``
+    with corresponding weights ``w_flat[offsets[i]:offsets[i + 1]]``.
+    Non-empty neighborhoods with zero total weight are set to NaN,
+    and their number is returned.
+    """
+    n_query, n_outputs = out.shape
+    n_zero_weight = 0
+    for i in prange(n_query):
+        start = offsets[i]
+        stop = offsets[i + 1]
+        for o in range(n_outputs):
+            out[i, o] = 0.
+        if start == stop:
+            for o in range(n_outputs):
+                out[i, o] = np.nan
+            continue
+        denom = 0.
+        for j in range(start, stop):
+            w = w_flat[j]
+            denom += w
+            for o in range(n_outputs):
+                out[i, o] += w * _y[idx_flat[j], o]
+        if denom == 0.:
+            n_zero_weight += 1
+            for o in range(n_outputs):
+                out[i, o] = np.nan
+        else:
+            for o in range(n_outputs):
+                out[i, o] /= denom
+    return n_zero_weight
+
+
+if NUMBA_AVAILABLE:
+    # Cache compiled kernels on disk to avoid JIT cost in every new process
+    _radius_mean = njit(parallel=True, cache=True)(_radius_mean)
+    _radius_weighted_mean = njit(parallel=True, cache=True)(_radius_weighted_mean)
+
+
+@contextmanager
+def _numba_threads(n_jobs):
+    """ Temporarily limit the number of threads used by Numba kernels to ``n_jobs``. """
+    n_threads = get_num_threads()
+    set_num_threads(max(1, min(n_jobs, numba_config.NUMBA_NUM_THREADS)))
+    try:
+        yield
+    finally:
+        set_num_threads(n_threads)
+
+
+# Minimum number of queries per chunk, for which parallel aggregation pays off
+_MIN_CHUNK_SIZE = 1024
+
+
+def _aggregate_in_chunks(aggregate, _y, neigh_ind, weights, out, n_jobs):
+    """ Apply ``aggregate`` to chunks of queries in parallel threads writing into ``out``.
+
+    Small queries, or ``n_jobs == 1``, are aggregated directly without joblib overhead.
+    Returns whether any of the calls to ``aggregate`` returned True.
+    """
+    n_query = out.shape[0]
+    n_chunks = min(4 * n_jobs, n_query // _MIN_CHUNK_SIZE)
+    if n_jobs == 1 or n_chunks <= 1:
+        return bool(aggregate(_y, neigh_ind, weights, out))
+    delayed_aggregate = delayed(aggregate)
+    # Workers write into ``out``, so they must share memory even within process-based backends
+    parallel_kwargs = {"require": "sharedmem"}
+    return any(Parallel(n_jobs, **parallel_kwargs)(
+        delayed_aggregate(_y, neigh_ind[s],
+                          None if weights is None else weights[s],
+                          out[s])
+        for s in gen_even_slices(n_query, n_chunks)
+    ))
+
+
+def _kneighbors_aggregate(_y, neigh_ind, weights, out):
+    """ Write the (weighted) mean target of each k-neighborhood into ``out``.
+
+    Rows whose weights sum to zero are set to NaN.
+    Returns whether any such row was encountered.
+    """
+    # Gather neighbor targets once, shape (n_query, n_neighbors, n_outputs)
+    Y = _y[neigh_ind].astype(out.dtype, copy=False)
+    if weights is None:
+        Y.mean(axis=1, out=out)
+    else:
+        weights = weights.astype(out.dtype, copy=False)
+        denom = np.sum(weights, axis=1)
+        np.einsum('ik,iko->io', weights, Y, out=out)
+        zero_weight = denom == 0
+        # Normalize in place, and predict NaN for rows with zero total weight
+        np.divide(out, denom[:, None], out=out, where=~zero_weight[:, None])
+        if zero_weight.any():
+            out[zero_weight] = np.nan
+            return True
+    return False
+
+
+def _check_out(out, n_query, n_outputs, y_is_1d, dtype):
+    """ Validate a user-provided prediction buffer and return its 2D view. """
+    shape = (n_query, ) if y_is_1d else (n_query, n_outputs)
+    if not isinstance(out, np.ndarray) or out.shape != shape:
+        raise ValueError(f'Expected out to be an array of shape {shape}, '
+                         f'but got {getattr(out, "shape", type(out))}.')
+    if out.dtype != dtype:
+        raise ValueError(f'Expected out with dtype {np.dtype(dtype)}, but got {out.dtype}.')
+    if not out.flags.c_contiguous:
+        raise ValueError('Expected out to be C-contiguous.')
+    return out.reshape((n_query, n_outputs))
+
+
+def _radius_aggregate(_y, neigh_ind, weights, out):
+    """ Write the (weighted) mean target of each radius neighborhood into ``out`` (NaN for empty ones).
+
+    Non-empty neighborhoods with zero total weight are set to NaN.
+    Returns whether any such neighborhood was encountered.
+    """
+    any_zero_weight = False
+    for i, ind in enumerate(neigh_ind):
+        if not len(ind):
+            out[i] = np.nan
+        elif weights is None:
+            out[i] = _y[ind, :].mean(axis=0)
+        else:
+            # Fused weighted sum, avoiding the validation overhead of np.average
+            denom = weights[i].sum()
+            if denom == 0:
+                any_zero_weight = True
+                out[i] = np.nan
+            else:
+                out[i] = (weights[i] @ _y[ind, :]) / denom
+    return any_zero_weight
+
 
 class KNeighborsRegressor(NeighborsBase, KNeighborsMixin,
                           SupervisedFloatMixin,
@@ -117,7 +286,8 @@ class KNeighborsRegressor(NeighborsBase, KNeighborsMixin,
         Additional keyword arguments for the metric function.
 
     n_jobs: int or None, optional (default=None)
-        The number of parallel jobs to run for neighbors search.
+        The number of parallel jobs to run for neighbors search
+        and for aggregating the neighbors' targets in :meth:`predict`.
         ``None`` means 1 unless in a :obj:`joblib.parallel_backend` context.
         ``-1`` means using all processors. See scikit-learn
         `Glossary <https://scikit-learn.org/stable/glossary.html#term-n-jobs>`_
@@ -158,6 +328,9 @@ class KNeighborsRegressor(NeighborsBase, KNeighborsMixin,
     https://en.wikipedia.org/wiki/K-nearest_neighbor_algorithm
     """
 
+    # Aggregate in single precision, if the training targets are float32
+    _float32_prediction = True
+
     def __init__(self, n_neighbors=5, weights='uniform',
                  algorithm: str = 'auto', algorithm_params: dict = None,
                  hubness: str = None, hubness_params: dict = None,
@@ -174,7 +347,7 @@ class KNeighborsRegressor(NeighborsBase, KNeighborsMixin,
             metric_params=metric_params, n_jobs=n_jobs, **kwargs)
         self.weights = _check_weights(weights)
 
-    def predict(self, X):
+    def predict(self, X, out=None):
         """Predict the target for the provided data
 
         Parameters
@@ -183,10 +356,16 @@ class KNeighborsRegressor(NeighborsBase, KNeighborsMixin,
                 or (n_query, n_indexed) if metric == 'precomputed'
             Test samples.
 
+        out: ndarray, optional
+            Preallocated buffer the predictions are written to, which avoids
+            allocating a new array on every call (e.g. when predicting in a loop).
+            Must be C-contiguous with the shape of the returned target values,
+            and dtype float32, if the training targets are float32, else float64.
+
         Returns
         -------
         y: array of int, shape = [n_samples] or [n_samples, n_outputs]
-            Target values
+            Target values (``out``, if provided)
         """
         if issparse(X) and self.metric == 'precomputed':
             raise ValueError(
@@ -195,25 +374,38 @@ class KNeighborsRegressor(NeighborsBase, KNeighborsMixin,
             )
         X = check_array(X, accept_sparse='csr')
 
-        neigh_dist, neigh_ind = self.kneighbors(X)
-
-        weights = _get_weights(neigh_dist, self.weights)
+        if self.weights in (None, 'uniform'):
+            # Uniform weights do not require the neighbor distances
+            neigh_ind = self.kneighbors(X, return_distance=False)
+            weights = None
+        else:
+            neigh_dist, neigh_ind = self.kneighbors(X)
+            weights = _get_weights(neigh_dist, self.weights)
 
-        _y = self._y
-        if _y.ndim == 1:
-            _y = _y.reshape((-1, 1))
+        _y = self._get_y_2d()
 
-        if weights is None:
-            y_pred = np.mean(_y[neigh_ind], axis=1)
+        if self._float32_prediction and _y.dtype == np.float32:
+            dtype = np.float32
         else:
-            y_pred = np.empty((X.shape[0], _y.shape[1]), dtype=np.float64)
-            denom = np.sum(weights, axis=1)
-
-            for j in range(_y.shape[1]):
-                num = np.sum(_y[neigh_ind, j] * weights, axis=1)
-                y_pred[:, j] = num / denom
+            dtype = np.float64
 
-        if self._y.ndim == 1:
+        # Aggregate chunks of queries in parallel threads writing into y_pred
+        n_query = neigh_ind.shape[0]
+        if out is None:
+            y_pred = np.empty((n_query, _y.shape[1]), dtype=dtype)
+        else:
+            y_pred = _check_out(out, n_query, _y.shape[1], self._y_is_1d, dtype)
+        n_jobs = effective_n_jobs(self.n_jobs)
+        any_zero_weight = _aggregate_in_chunks(_kneighbors_aggregate, _y, neigh_ind, weights, y_pred, n_jobs)
+
+        if any_zero_weight:
+            zero_weight_warning_msg = ("One or more samples have neighbor "
+                                       "weights summing to zero; predicting NaN.")
+            warnings.warn(zero_weight_warning_msg)
+
+        if out is not None:
+            return out
+        elif self._y_is_1d:
             y_pred = y_pred.ravel()
 
         return y_pred
@@ -306,7 +498,8 @@ class RadiusNeighborsRegressor(NeighborsBase, RadiusNeighborsMixin,
         Additional keyword arguments for the metric function.
 
     n_jobs: int or None, optional (default=None)
-        The number of parallel jobs to run for neighbors search.
+        The number of parallel jobs to run for neighbors search
+        and for aggregating the neighbors' targets in :meth:`predict`.
         ``None`` means 1 unless in a :obj:`joblib.parallel_backend` context.
         ``-1`` means using all processors. See scikit-learn
         `Glossary <https://scikit-learn.org/stable/glossary.html#term-n-jobs>`_
@@ -339,6 +532,9 @@ class RadiusNeighborsRegressor(NeighborsBase, RadiusNeighborsMixin,
     https://en.wikipedia.org/wiki/K-nearest_neighbor_algorithm
     """
 
+    # Aggregate in single precision, if the training targets are float32
+    _float32_prediction = True
+
     def __init__(self, radius=1.0, weights='uniform',
                  algorithm: str = 'auto', algorithm_params: dict = None,
                  hubness: str = None, hubness_params: dict = None,
@@ -355,7 +551,7 @@ class RadiusNeighborsRegressor(NeighborsBase, RadiusNeighborsMixin,
             n_jobs=n_jobs, **kwargs)
         self.weights = _check_weights(weights)
 
-    def predict(self, X):
+    def predict(self, X, out=None):
         """Predict the target for the provided data
 
         Parameters
@@ -363,40 +559,74 @@ class RadiusNeighborsRegressor(NeighborsBase, RadiusNeighborsMixin,
         X: array-like, shape (n_query, n_features), or (n_query, n_indexed) if metric == 'precomputed'
             Test samples.
 
+        out: ndarray, optional
+            Preallocated buffer the predictions are written to, which avoids
+            allocating a new array on every call (e.g. when predicting in a loop).
+            Must be C-contiguous with the shape of the returned target values,
+            and dtype float32, if the training targets are float32, else float64.
+
         Returns
         -------
         y: array of float, shape = [n_samples] or [n_samples, n_outputs]
-            Target values
+            Target values (``out``, if provided)
         """
         X = check_array(X, accept_sparse='csr')
 
-        neigh_dist, neigh_ind = self.radius_neighbors(X)
-
-        weights = _get_weights(neigh_dist, self.weights)
+        if self.weights in (None, 'uniform'):
+            # Uniform weights do not require the neighbor distances
+            neigh_ind = self.radius_neighbors(X, return_distance=False)
+            weights = None
+        else:
+            neigh_dist, neigh_ind = self.radius_neighbors(X)
+            weights = _get_weights(neigh_dist, self.weights)
 
-        _y = self._y
-        if _y.ndim == 1:
-            _y = _y.reshape((-1, 1))
+        _y = self._get_y_2d()
 
-        empty_obs = np.full_like(_y[0], np.nan)
+        if self._float32_prediction and _y.dtype == np.float32:
+            dtype = np.float32
+        else:
+            dtype = np.float64
 
-        if weights is None:
-            y_pred = np.array([np.mean(_y[ind, :], axis=0)
-                               if len(ind) else empty_obs
-                               for (i, ind) in enumerate(neigh_ind)])
+        # Track empty neighborhoods here instead of scanning y_pred for NaN
+        n_neigh = np.array([len(ind) for ind in neigh_ind], dtype=np.int64)
+        any_empty = not np.all(n_neigh)
 
+        n_query = len(neigh_ind)
+        if out is None:
+            y_pred = np.empty((n_query, _y.shape[1]), dtype=dtype)
         else:
-            y_pred = np.array([np.average(_y[ind, :], axis=0,
-                               weights=weights[i])
-                               if len(ind) else empty_obs
-                               for (i, ind) in enumerate(neigh_ind)])
+            y_pred = _check_out(out, n_query, _y.shape[1], self._y_is_1d, dtype)
+        n_jobs = effective_n_jobs(self.n_jobs)
+        if NUMBA_AVAILABLE:
+            # Flatten the ragged neighborhoods for the compiled kernels,
+            # which run in (at most) n_jobs threads
+            offsets = np.zeros(n_query + 1, dtype=np.int64)
+            np.cumsum(n_neigh, out=offsets[1:])
+            idx_flat = np.concatenate(list(neigh_ind)).astype(np.int64, copy=False)
+            with _numba_threads(n_jobs):
+                if weights is None:
+                    _radius_mean(_y, idx_flat, offsets, y_pred)
+                    any_zero_weight = False
+                else:
+                    w_flat = np.concatenate(list(weights)).astype(dtype, copy=False)
+                    any_zero_weight = _radius_weighted_mean(_y, idx_flat, w_flat, offsets, y_pred) > 0
+        else:
+            # Aggregate chunks of queries in parallel threads writing into y_pred
+            any_zero_weight = _aggregate_in_chunks(_radius_aggregate, _y, neigh_ind, weights, y_pred, n_jobs)
 
-        if np.max(np.isnan(y_pred)):
+        if any_empty:
             empty_warning_msg = ("One or more samples have no neighbors "
                                  "within specified radius; predicting NaN.")
             warnings.warn(empty_warning_msg)
 
-        if self._y.ndim == 1:
+        if any_zero_weight:
+            zero_weight_warning_msg = ("One or more samples have neighbor "
+                                       "weights summing to zero; predicting NaN.")
+            warnings.warn(zero_weight_warning_msg)
+
+        if out is not None:
+            return out
+        elif self._y_is_1d:
             y_pred = y_pred.ravel()
 
         return y_pred
@@ -5,6 +5,7 @@ import os
 from pickle import PicklingError
 import platform
 import sys
+from types import SimpleNamespace
 import warnings
 
 import numpy as np
@@ -38,7 +39,7 @@ from sklearn.utils._joblib import joblib
 from sklearn.utils._joblib import parallel_backend
 
 from skhubness import neighbors
-from skhubness.neighbors.base import ALG_WITHOUT_RADIUS_QUERY
+from skhubness.neighbors.base import ALG_WITHOUT_RADIUS_QUERY, RadiusNeighborsMixin
 from skhubness.reduction import hubness_algorihtms
 from skhubness.utils.platform import available_ann_algorithms_on_current_platform
 
@@ -1031,6 +1032,211 @@ def test_RadiusNeighborsRegressor_multioutput(algorithm, weights,
     assert np.all(np.abs(y_pred - y_target) < 0.3)
 
 
+def _zero_weight_func(dist):
+    """ Weight function assigning zero weight to all neighbors.
+    Works for 2D distance arrays as well as ragged (object) arrays. """
+    return dist * 0.
+
+
+def test_kneighbors_regressor_zero_weights():
+    # Zero total weight results in NaN predictions and a warning
+    rng = check_random_state(0)
+    X = rng.rand(20, 3)
+    y = rng.rand(20, 2)
+
+    knn = neighbors.KNeighborsRegressor(n_neighbors=3, weights=_zero_weight_func)
+    knn.fit(X, y)
+    msg = "One or more samples have neighbor weights summing to zero; predicting NaN."
+    y_pred = assert_warns_message(UserWarning, msg, knn.predict, X[:5])
+    assert np.all(np.isnan(y_pred))
+
+
+@pytest.mark.parametrize('use_numba', [True, False])
+def test_radius_neighbors_regressor_zero_weights(use_numba, monkeypatch):
+    # Zero total weight results in NaN predictions and a warning
+    from skhubness.neighbors import regression
+    if use_numba:
+        pytest.importorskip('numba')
+    else:
+        monkeypatch.setattr(regression, 'NUMBA_AVAILABLE', False)
+    rng = check_random_state(0)
+    X = rng.rand(20, 3)
+    y = rng.rand(20, 2)
+
+    rnn = neighbors.RadiusNeighborsRegressor(radius=1., weights=_zero_weight_func)
+    rnn.fit(X, y)
+    msg = "One or more samples have neighbor weights summing to zero; predicting NaN."
+    y_pred = assert_warns_message(UserWarning, msg, rnn.predict, X[:5])
+    assert np.all(np.isnan(y_pred))
+
+
+@pytest.mark.parametrize('weights', ['uniform', 'distance', _weight_func])
+@pytest.mark.parametrize('dtype', [np.float64, np.float32])
+def test_radius_neighbors_regressor_numpy_fallback(weights, dtype, monkeypatch):
+    # The pure NumPy aggregation yields the same predictions as the Numba kernels
+    pytest.importorskip('numba')
+    from skhubness.neighbors import regression
+    rng = check_random_state(0)
+    X = rng.rand(40, 5)
+    y = rng.rand(40, 3).astype(dtype)
+    X_train, X_test, y_train, _ = train_test_split(X, y, random_state=0)
+    # Include a query without neighbors within radius
+    X_test[0] = 10.
+
+    rnn = neighbors.RadiusNeighborsRegressor(radius=1., weights=weights)
+    rnn.fit(X_train, y_train)
+    with pytest.warns(UserWarning, match='no neighbors'):
+        y_pred_numba = rnn.predict(X_test)
+    monkeypatch.setattr(regression, 'NUMBA_AVAILABLE', False)
+    with pytest.warns(UserWarning, match='no neighbors'):
+        y_pred_numpy = rnn.predict(X_test)
+
+    assert y_pred_numpy.dtype == y_pred_numba.dtype
+    assert np.all(np.isnan(y_pred_numba[0]))
+    assert_array_almost_equal(y_pred_numpy, y_pred_numba, decimal=5)
+
+
+@pytest.mark.parametrize('n_neighbors', [1, 2, 5])
+@pytest.mark.parametrize('metric', ['euclidean', 'manhattan'])
+@pytest.mark.parametrize('return_distance', [True, False])
+def test_kneighbors_reduce_func(n_neighbors, metric, return_distance):
+    # Reduce chunks of distances to the sorted nearest neighbors
+    rng = check_random_state(0)
+    dist = rng.rand(10, 30)
+    estimator = SimpleNamespace(effective_metric_=metric)
+    result = RadiusNeighborsMixin._kneighbors_reduce_func(
+        estimator, dist.copy(), 0, n_neighbors=n_neighbors, return_distance=return_distance)
+
+    ind_ref = np.argsort(dist, axis=1)[:, :n_neighbors]
+    dist_ref = np.take_along_axis(dist, ind_ref, axis=1)
+    if metric == 'euclidean':
+        # Squared euclidean distances are passed to the reduce function
+        dist_ref = np.sqrt(dist_ref)
+
+    if return_distance:
+        neigh_dist, neigh_ind = result
+        assert neigh_dist.shape == (10, n_neighbors)
+        assert np.all(np.diff(neigh_dist, axis=1) >= 0)
+        assert_array_almost_equal(neigh_dist, dist_ref)
+    else:
+        neigh_ind = result
+    assert neigh_ind.shape == (10, n_neighbors)
+    assert_array_equal(neigh_ind, ind_ref)
+
+
+@pytest.mark.parametrize('Regressor', [neighbors.KNeighborsRegressor,
+                                       neighbors.RadiusNeighborsRegressor])
+@pytest.mark.parametrize('weights', ['uniform', 'distance'])
+def test_neighbors_regressor_float32_targets(Regressor, weights):
+    # Float32 targets are aggregated in single precision
+    rng = check_random_state(0)
+    X = rng.rand(40, 5)
+    y = rng.rand(40, 2)
+    X_train, X_test, y_train, _ = train_test_split(X, y, random_state=0)
+
+    reg = Regressor(weights=weights, algorithm='brute')
+    y_pred64 = reg.fit(X_train, y_train).predict(X_test)
+    y_pred32 = reg.fit(X_train, y_train.astype(np.float32)).predict(X_test)
+
+    assert y_pred64.dtype == np.float64
+    assert y_pred32.dtype == np.float32
+    assert_array_almost_equal(y_pred32, y_pred64, decimal=5)
+
+
+@pytest.mark.parametrize('Regressor', [neighbors.KNeighborsRegressor,
+                                       neighbors.RadiusNeighborsRegressor])
+@pytest.mark.parametrize('weights', ['uniform', 'distance'])
+def test_neighbors_regressor_n_jobs(Regressor, weights, monkeypatch):
+    # Parallel aggregation of targets yields the same predictions
+    from skhubness.neighbors import regression
+    # Split even these few queries into chunks
+    monkeypatch.setattr(regression, '_MIN_CHUNK_SIZE', 1)
+    rng = check_random_state(0)
+    X = rng.rand(40, 5)
+    y = rng.rand(40, 3)
+    X_train, X_test, y_train, _ = train_test_split(X, y, random_state=0)
+
+    y_pred = [Regressor(weights=weights, n_jobs=n_jobs)
+              .fit(X_train, y_train).predict(X_test)
+              for n_jobs in [1, 2]]
+    assert_array_almost_equal(*y_pred)
+
+    # Workers write into the shared output also within process-based backends
+    for backend in ['loky', 'multiprocessing']:
+        with parallel_backend(backend, n_jobs=2):
+            y_pred_backend = Regressor(weights=weights, n_jobs=2).fit(X_train, y_train).predict(X_test)
+        assert_array_almost_equal(y_pred_backend, y_pred[0])
+
+
+@pytest.mark.parametrize('n_jobs', [None, 1, 2])
+@pytest.mark.parametrize('weights', ['uniform', 'distance'])
+def test_radius_neighbors_regressor_numba_threads(n_jobs, weights, monkeypatch):
+    # The Numba kernels respect n_jobs, and the thread count is restored afterwards
+    numba = pytest.importorskip('numba')
+    from skhubness.neighbors import regression
+    n_threads_used = []
+
+    def record_threads(kernel):
+        def wrapper(*args):
+            n_threads_used.append(numba.get_num_threads())
+            return kernel(*args)
+        return wrapper
+
+    monkeypatch.setattr(regression, '_radius_mean', record_threads(regression._radius_mean))
+    monkeypatch.setattr(regression, '_radius_weighted_mean',
+                        record_threads(regression._radius_weighted_mean))
+    n_threads = numba.get_num_threads()
+
+    rng = check_random_state(0)
+    X = rng.rand(40, 5)
+    y = rng.rand(40, 2)
+    rnn = neighbors.RadiusNeighborsRegressor(weights=weights, n_jobs=n_jobs)
+    rnn.fit(X, y).predict(X)
+
+    expected = min(joblib.effective_n_jobs(n_jobs), numba.config.NUMBA_NUM_THREADS)
+    assert n_threads_used == [expected]
+    assert numba.get_num_threads() == n_threads
+
+
+@pytest.mark.parametrize('Regressor', [neighbors.KNeighborsRegressor,
+                                       neighbors.RadiusNeighborsRegressor])
+@pytest.mark.parametrize('n_output', [1, 3])
+def test_neighbors_regressor_predict_out(Regressor, n_output):
+    # Predictions are written into a user-provided buffer
+    rng = check_random_state(0)
+    X = rng.rand(40, 5)
+    y = rng.rand(40, n_output).squeeze()
+    X_train, X_test, y_train, _ = train_test_split(X, y, random_state=0)
+
+    reg = Regressor(weights='distance').fit(X_train, y_train)
+    y_pred = reg.predict(X_test)
+    out = np.empty_like(y_pred)
+    assert reg.predict(X_test, out=out) is out
+    assert_array_almost_equal(out, y_pred)
+
+    assert_raises(ValueError, reg.predict, X_test, out=out[:-1])
+    assert_raises(ValueError, reg.predict, X_test, out=out.astype(np.float32))
+
+
+@pytest.mark.parametrize('Regressor', [neighbors.KNeighborsRegressor,
+                                       neighbors.RadiusNeighborsRegressor])
+def test_neighbors_regressor_refit_target_shape(Regressor):
+    # Cached 2D targets are refreshed when refitting with different target shapes
+    rng = check_random_state(0)
+    X = rng.rand(20, 3)
+    y = rng.rand(20, 2)
+    reg = Regressor()
+
+    assert reg.fit(X, y).predict(X).shape == (20, 2)
+    assert reg.fit(X, y[:, 0]).predict(X).shape == (20, )
+    assert_array_almost_equal(reg.predict(X), Regressor().fit(X, y[:, 0]).predict(X))
+    assert reg.fit(X, y).predict(X).shape == (20, 2)
+
+    # Estimators fitted without the cache (e.g. unpickled from older versions)
+    del reg._y_2d, reg._y_is_1d
+    assert_array_almost_equal(reg.predict(X), Regressor().fit(X, y).predict(X))
+
+
 @pytest.mark.parametrize('sparsemat', SPARSE_TYPES)
 def test_kneighbors_regressor_sparse(sparsemat,
                                      n_samples=40,
@@ -5,11 +5,16 @@
 The :mod:`skhubness.reduction` package provides methods for hubness reduction.
 """
 
-from .base import NoHubnessReduction
-from .mutual_proximity import MutualProximity
-from .local_scaling import LocalScaling
-from .dis_sim import DisSimLocal
-# from .shared_neighbors import SharedNearestNeighbors, SimhubIn
+from importlib import import_module
+
+# Hubness reduction classes are imported lazily on first access (PEP 562)
+_LAZY_IMPORTS = {'NoHubnessReduction': '.base',
+                 'MutualProximity': '.mutual_proximity',
+                 'LocalScaling': '.local_scaling',
+                 'DisSimLocal': '.dis_sim',
+                 # 'SharedNearestNeighbors': '.shared_neighbors',
+                 # 'SimhubIn': '.shared_neighbors',
+                 }
 hubness_algorihtms = ['mp',
                       'ls',
                       'dsl',
@@ -24,3 +29,18 @@ __all__ = ['NoHubnessReduction',
            # 'SimhubIn',
            'hubness_algorihtms',
            ]
+
+
+def __getattr__(name):
+    try:
+        module_name = _LAZY_IMPORTS[name]
+    except KeyError:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}') from None
+    value = getattr(import_module(module_name, __name__), name)
+    # Cache in the module namespace, so that __getattr__ is not called again
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_IMPORTS))
@@ -1,6 +1,9 @@
 from itertools import product
 # SPDX-License-Identifier: BSD-3-Clause
 
+import subprocess
+import sys
+
 import pytest
 from sklearn.datasets import make_classification
 from sklearn.utils.testing import assert_array_equal
@@ -52,3 +55,18 @@ def test_same_indices():
     neigh_ind_ht_no_dist = hr.fit_transform(neigh_dist, neigh_ind, X, return_distance=False)
     assert_array_equal(neigh_ind, neigh_ind_hr)
     assert_array_equal(neigh_ind_hr, neigh_ind_ht_no_dist)
+
+
+def test_reduction_is_imported_lazily():
+    # Hubness reduction modules are only imported on first access
+    modules = ['skhubness.reduction.base',
+               'skhubness.reduction.mutual_proximity',
+               'skhubness.reduction.local_scaling',
+               'skhubness.reduction.dis_sim',
+               ]
+    code = ('import sys\n'
+            'import skhubness.reduction\n'
+            f'assert not any(m in sys.modules for m in {modules})\n'
+            'skhubness.reduction.MutualProximity\n'
+            'assert "skhubness.reduction.mutual_proximity" in sys.modules\n')
+    subprocess.run([sys.executable, '-c', code], check=True)